@@ -1,6 +1,7 @@
 import os
 import shutil
 import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
 from loguru import logger
@@ -8,11 +9,21 @@ from loguru import logger
 from backend.services.agent_service import agent_instance
 from backend.services.transcription import transcribe_audio
 
+# --- Application Lifespan ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keeps the Ollama model warm while the API is running."""
+    agent_instance.start_warmup()
+    yield
+    agent_instance.stop()
+
+
 # --- FastAPI App Initialization ---
 app = FastAPI(
     title="Advanced Audio Agent API",
     description="An API for transcribing audio and getting a response from a conversational agent.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # --- Logging Configuration ---
@@ -68,6 +79,14 @@ async def process_audio_endpoint(file: UploadFile = File(...)):
             logger.info(f"Cleaned up temporary file: {temp_file_path}")
 
 
+@app.get("/metrics/llm")
+def llm_metrics_endpoint():
+    """
+    Returns LLM latency metrics, split into cold turns and steady-state turns.
+    """
+    return agent_instance.get_latency_metrics()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Advanced Audio Agent API. Use the /docs endpoint to see the API documentation."}
@@ -1,10 +1,96 @@
-from typing import TypedDict
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Optional, TypedDict, Union
 # Remove Annotated and operator, as they are no longer needed
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_ollama import ChatOllama
 from langgraph.graph import StateGraph, END
 from loguru import logger
 
+# --- Configuration ---
+# How long Ollama keeps the model loaded after a request: whole seconds ("300", "-1" = forever)
+# or a Go-style duration ("30m", "1h30m").
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Context window and CPU threads used by the Ollama runner. Changing either
+# forces Ollama to reload the model, so every request must send the same values.
+NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "2048"))
+NUM_THREAD = int(os.getenv("OLLAMA_NUM_THREAD", "0")) or None
+# Seconds of idleness after which a background ping keeps the model loaded. It is shortened to fit
+# inside a finite KEEP_ALIVE so pings land before Ollama unloads the model. 0 disables warm-up.
+WARMUP_INTERVAL = float(os.getenv("OLLAMA_WARMUP_INTERVAL", "600"))
+# Fixed prefix sent first on every request so Ollama can reuse its KV cache for it.
+SYSTEM_PROMPT = os.getenv(
+    "AGENT_SYSTEM_PROMPT",
+    "You are a helpful voice assistant. Answer clearly and concisely, "
+    "in a few short sentences suitable for being read aloud."
+)
+
+# Ollama reports load_duration in nanoseconds; a turn that spent longer than this loading was cold.
+_COLD_LOAD_THRESHOLD_NS = 100_000_000
+# Largest head start a warm-up ping takes over the keep-alive expiry.
+_WARMUP_MARGIN_SECONDS = 30.0
+
+# Go duration units, as accepted by Ollama's time.ParseDuration.
+_DURATION_UNITS = {
+    "ns": 1e-9, "us": 1e-6, "µs": 1e-6, "μs": 1e-6, "ms": 1e-3, "s": 1, "m": 60, "h": 3600,
+}
+_DURATION_PART = r"(\d+\.?\d*|\.\d+)(ns|us|µs|μs|ms|s|m|h)"
+_DURATION_RE = re.compile(rf"([+-]?)((?:{_DURATION_PART})+)")
+
+
+def _normalize_keep_alive(keep_alive: Union[int, str]) -> Union[int, str]:
+    """
+    Converts a keep-alive setting into the form Ollama accepts.
+
+    Ollama parses a string keep-alive as a Go duration, which requires a unit,
+    while a number is read as seconds. Whole numbers are therefore sent as int.
+
+    Args:
+        keep_alive (Union[int, str]): Whole seconds or a Go duration such as "30m" or "1h30m".
+
+    Returns:
+        Union[int, str]: The keep-alive as int seconds or a validated duration string.
+
+    Raises:
+        ValueError: If the value is neither whole seconds nor a valid duration.
+    """
+    if isinstance(keep_alive, int):
+        return keep_alive
+    value = str(keep_alive).strip()
+    if re.fullmatch(r"[+-]?\d+", value):
+        return int(value)
+    if _DURATION_RE.fullmatch(value):
+        return value
+    raise ValueError(
+        f"Invalid keep-alive value '{keep_alive}'. Use whole seconds (e.g. 300, -1) "
+        "or a duration such as 30m or 1h30m."
+    )
+
+
+def _keep_alive_seconds(keep_alive: Union[int, str]) -> Optional[float]:
+    """
+    Converts a normalized Ollama keep-alive value into seconds.
+
+    Args:
+        keep_alive (Union[int, str]): A value returned by _normalize_keep_alive.
+
+    Returns:
+        Optional[float]: The duration in seconds, or None if the model is kept forever.
+    """
+    if isinstance(keep_alive, int):
+        seconds = float(keep_alive)
+    else:
+        match = _DURATION_RE.fullmatch(keep_alive)
+        sign, body = match.group(1), match.group(2)
+        seconds = sum(float(amount) * _DURATION_UNITS[unit]
+                      for amount, unit in re.findall(_DURATION_PART, body))
+        if sign == "-":
+            seconds = -seconds
+    return None if seconds < 0 else seconds
+
 
 # --- Agent State (Corrected) ---
 class AgentState(TypedDict):
@@ -18,15 +104,50 @@ class AgentState(TypedDict):
 class ConversationalAgent:
     """A simple conversational agent powered by a local Ollama model."""
 
-    def __init__(self, model_name: str = "deepseek-r1:1.5b"):
+    def __init__(
+        self,
+        model_name: str = "deepseek-r1:1.5b",
+        keep_alive: Union[int, str] = KEEP_ALIVE,
+        num_ctx: int = NUM_CTX,
+        num_thread: Optional[int] = NUM_THREAD,
+        warmup_interval: float = WARMUP_INTERVAL,
+        system_prompt: str = SYSTEM_PROMPT,
+    ):
         """
         Initializes the agent with a ChatOllama model and a compiled LangGraph.
 
         Args:
             model_name (str): The name of the Ollama model to use.
+            keep_alive (Union[int, str]): How long Ollama keeps the model loaded after a request,
+                as whole seconds or a duration such as "30m".
+            num_ctx (int): The context window size for the model.
+            num_thread (Optional[int]): CPU threads for Ollama, or None for its default.
+            warmup_interval (float): Idle seconds before a background warm-up ping; 0 disables it.
+            system_prompt (str): The fixed system prompt prefixed to every request.
         """
         logger.info(f"Initializing agent with model: {model_name}")
-        self.llm = ChatOllama(model=model_name, temperature=0)
+        keep_alive = _normalize_keep_alive(keep_alive)
+        llm_options = dict(
+            model=model_name,
+            temperature=0,
+            keep_alive=keep_alive,
+            num_ctx=num_ctx,
+            num_thread=num_thread,
+        )
+        self.llm = ChatOllama(**llm_options)
+        # Same load options as self.llm so a ping never triggers a reload; one token is enough.
+        self._warmup_llm = ChatOllama(**llm_options, num_predict=1)
+        self._system_message = SystemMessage(content=system_prompt)
+        self._keep_alive_seconds = _keep_alive_seconds(keep_alive)
+        self._warmup_interval = self._effective_warmup_interval(warmup_interval)
+
+        self._lock = threading.Lock()
+        self._last_activity: Optional[float] = None
+        # Only the most recent turns are kept so the metrics stay bounded.
+        self._latencies = {"cold": deque(maxlen=500), "steady": deque(maxlen=500)}
+        self._stop_event = threading.Event()
+        self._warmup_thread: Optional[threading.Thread] = None
+
         self.graph = self._build_graph()
 
     def _build_graph(self) -> StateGraph:
@@ -38,6 +159,120 @@ class ConversationalAgent:
         logger.info("Compiling agent graph.")
         return workflow.compile()
 
+    def _effective_warmup_interval(self, warmup_interval: float) -> float:
+        """
+        Fits the warm-up interval inside the keep-alive window.
+
+        Args:
+            warmup_interval (float): The configured idle seconds before a warm-up ping.
+
+        Returns:
+            float: The interval to use, or 0 if warm-up is disabled or pointless.
+        """
+        if warmup_interval <= 0 or self._keep_alive_seconds is None:
+            return warmup_interval
+        if self._keep_alive_seconds == 0:
+            logger.warning("Keep-alive is 0, so Ollama unloads the model after every request; disabling warm-up.")
+            return 0
+        margin = min(_WARMUP_MARGIN_SECONDS, self._keep_alive_seconds / 10)
+        interval = min(warmup_interval, self._keep_alive_seconds - margin)
+        if interval < warmup_interval:
+            logger.warning(
+                f"Warm-up interval {warmup_interval:.0f}s exceeds keep-alive {self._keep_alive_seconds:.0f}s; "
+                f"pinging every {interval:.0f}s instead."
+            )
+        return interval
+
+    def _is_model_resident(self) -> bool:
+        """Returns whether Ollama should still hold the model in memory."""
+        if self._last_activity is None:
+            return False
+        if self._keep_alive_seconds is None:
+            return True
+        return time.monotonic() - self._last_activity < self._keep_alive_seconds
+
+    def warm_up(self) -> bool:
+        """
+        Sends a minimal request so Ollama loads the model and caches the system prompt.
+
+        Returns:
+            bool: True if the warm-up request succeeded.
+        """
+        start = time.monotonic()
+        try:
+            self._warmup_llm.invoke([self._system_message, HumanMessage(content="Hi")])
+        except Exception as e:
+            logger.warning(f"Model warm-up failed: {e}")
+            return False
+        with self._lock:
+            self._last_activity = time.monotonic()
+        logger.info(f"Model warm-up completed in {(time.monotonic() - start) * 1000:.0f} ms.")
+        return True
+
+    def _warmup_loop(self):
+        """
+        Warms the model at startup and again once it has been idle for the warm-up interval.
+
+        Each ping is scheduled from the latest model activity, so while the API is idle the
+        model is pinged within one interval of its last use, which is inside the keep-alive window.
+        """
+        last_attempt = time.monotonic()
+        self.warm_up()
+        while True:
+            with self._lock:
+                last_activity = self._last_activity
+            # A failed ping leaves last_activity unchanged, so retry one interval after the attempt.
+            since = last_attempt if last_activity is None else max(last_activity, last_attempt)
+            if self._stop_event.wait(max(0.0, since + self._warmup_interval - time.monotonic())):
+                return
+            with self._lock:
+                last_activity = self._last_activity
+            if last_activity is None or time.monotonic() - last_activity >= self._warmup_interval:
+                last_attempt = time.monotonic()
+                self.warm_up()
+
+    def start_warmup(self):
+        """Starts the background warm-up thread, unless warm-up is disabled or already running."""
+        if self._warmup_interval <= 0:
+            logger.info("Model warm-up is disabled.")
+            return
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._warmup_thread = threading.Thread(target=self._warmup_loop, name="ollama-warmup", daemon=True)
+        self._warmup_thread.start()
+
+    def stop(self):
+        """Stops the background warm-up thread."""
+        self._stop_event.set()
+        if self._warmup_thread is not None:
+            # A ping already in flight is not interrupted; the daemon thread exits with the process.
+            self._warmup_thread.join(timeout=1)
+            self._warmup_thread = None
+
+    def get_latency_metrics(self) -> dict:
+        """
+        Summarises LLM latencies, split into cold turns and steady-state turns.
+
+        A turn is cold when Ollama reports loading the model for it. If Ollama does not report
+        a load duration, it is cold when the model was not expected to be loaded.
+
+        Returns:
+            dict: Count, average, last and max latency in milliseconds over recent turns of each kind.
+        """
+        with self._lock:
+            latencies = {kind: list(values) for kind, values in self._latencies.items()}
+
+        metrics = {}
+        for kind, values in latencies.items():
+            metrics[kind] = {
+                "count": len(values),
+                "avg_ms": round(sum(values) / len(values), 1) if values else None,
+                "last_ms": round(values[-1], 1) if values else None,
+                "max_ms": round(max(values), 1) if values else None,
+            }
+        return metrics
+
     def _generate_response(self, state: AgentState) -> AgentState:
         """
         Generates a response using the LLM based on the input text.
@@ -56,8 +291,19 @@ class ConversationalAgent:
         logger.info(f"Generating response for input: '{text_input}'")
         try:
             message = HumanMessage(content=text_input)
-            response = self.llm.invoke([message])
-            logger.success("Successfully generated response from LLM.")
+            with self._lock:
+                # Fallback guess, used only if Ollama does not report how long it spent loading.
+                kind = "steady" if self._is_model_resident() else "cold"
+            start = time.monotonic()
+            response = self.llm.invoke([self._system_message, message])
+            latency_ms = (time.monotonic() - start) * 1000
+            load_duration = response.response_metadata.get("load_duration")
+            if load_duration is not None:
+                kind = "cold" if load_duration > _COLD_LOAD_THRESHOLD_NS else "steady"
+            with self._lock:
+                self._last_activity = time.monotonic()
+                self._latencies[kind].append(latency_ms)
+            logger.success(f"Successfully generated response from LLM ({kind} turn, {latency_ms:.0f} ms).")
             return {"response": response.content}
         except Exception as e:
             logger.error(f"Error during LLM invocation: {e}")
@@ -2,7 +2,7 @@ import pytest
 import os
 from unittest.mock import MagicMock, patch
 
-from backend.services.agent_service import ConversationalAgent
+from backend.services.agent_service import ConversationalAgent, _keep_alive_seconds, _normalize_keep_alive
 from backend.services.transcription import transcribe_audio
 
 
@@ -14,6 +14,7 @@ def agent():
     with patch('backend.services.agent_service.ChatOllama') as MockOllama:
         mock_llm = MagicMock()
         mock_llm.invoke.return_value.content = "This is a mock response."
+        mock_llm.invoke.return_value.response_metadata = {}
         MockOllama.return_value = mock_llm
         yield ConversationalAgent(model_name="mock_model")
 
@@ -30,6 +31,151 @@ def test_agent_empty_input(agent):
     assert response == "Input text cannot be empty."
 
 
+@pytest.fixture
+def mock_ollama():
+    """Fixture patching ChatOllama, yielding the mock class."""
+    with patch('backend.services.agent_service.ChatOllama') as MockOllama:
+        MockOllama.return_value.invoke.return_value.content = "This is a mock response."
+        MockOllama.return_value.invoke.return_value.response_metadata = {}
+        yield MockOllama
+
+
+def test_agent_passes_residency_options(mock_ollama):
+    """Test that keep-alive and runner options are passed to Ollama."""
+    ConversationalAgent(model_name="mock_model", keep_alive="1h", num_ctx=4096,
+                        num_thread=4, warmup_interval=0)
+    kwargs = mock_ollama.call_args_list[0].kwargs
+    assert kwargs["keep_alive"] == "1h"
+    assert kwargs["num_ctx"] == 4096
+    assert kwargs["num_thread"] == 4
+
+
+def test_agent_sends_numeric_keep_alive_as_int(mock_ollama):
+    """Test that a unitless keep-alive reaches Ollama as a number, not a string."""
+    ConversationalAgent(model_name="mock_model", keep_alive="-1", warmup_interval=0)
+    keep_alive = mock_ollama.call_args_list[0].kwargs["keep_alive"]
+    assert keep_alive == -1
+    assert isinstance(keep_alive, int)
+
+
+def test_agent_rejects_invalid_keep_alive(mock_ollama):
+    """Test that an invalid keep-alive fails at startup instead of being guessed."""
+    with pytest.raises(ValueError):
+        ConversationalAgent(model_name="mock_model", keep_alive="forever", warmup_interval=0)
+
+
+def test_agent_prefixes_system_prompt(mock_ollama):
+    """Test that every request starts with the same system prompt."""
+    agent = ConversationalAgent(model_name="mock_model", system_prompt="Be brief.", warmup_interval=0)
+    agent.invoke_llm("hello")
+    agent.invoke_llm("again")
+    calls = mock_ollama.return_value.invoke.call_args_list
+    assert [c.args[0][0].content for c in calls] == ["Be brief.", "Be brief."]
+
+
+def test_agent_latency_metrics(mock_ollama):
+    """Test that without a reported load time the first turn is cold and later ones steady."""
+    agent = ConversationalAgent(model_name="mock_model", warmup_interval=0)
+    agent.invoke_llm("hello")
+    agent.invoke_llm("again")
+    metrics = agent.get_latency_metrics()
+    assert metrics["cold"]["count"] == 1
+    assert metrics["steady"]["count"] == 1
+
+
+def test_agent_latency_metrics_use_load_duration(mock_ollama):
+    """Test that Ollama's reported load time decides whether a turn was cold."""
+    agent = ConversationalAgent(model_name="mock_model", warmup_interval=0)
+    response = mock_ollama.return_value.invoke.return_value
+    # The model was already loaded when the backend started.
+    response.response_metadata = {"load_duration": 5_000_000}
+    agent.invoke_llm("hello")
+    # The model was evicted by Ollama between turns.
+    response.response_metadata = {"load_duration": 3_000_000_000}
+    agent.invoke_llm("again")
+    metrics = agent.get_latency_metrics()
+    assert metrics["steady"]["count"] == 1
+    assert metrics["cold"]["count"] == 1
+
+
+def test_agent_warm_up_makes_next_turn_steady(mock_ollama):
+    """Test that a successful warm-up marks the model as resident."""
+    agent = ConversationalAgent(model_name="mock_model", warmup_interval=0)
+    assert agent.warm_up()
+    agent.invoke_llm("hello")
+    assert agent.get_latency_metrics()["steady"]["count"] == 1
+
+
+def test_normalize_keep_alive():
+    """Test that keep-alive values are converted to what Ollama accepts."""
+    assert _normalize_keep_alive("300") == 300
+    assert _normalize_keep_alive("-1") == -1
+    assert _normalize_keep_alive("1h30m") == "1h30m"
+    with pytest.raises(ValueError):
+        _normalize_keep_alive("5 minutes")
+
+
+def test_agent_warmup_thread_lifecycle(mock_ollama):
+    """Test that warm-up only runs once started and stops on request."""
+    agent = ConversationalAgent(model_name="mock_model", warmup_interval=60)
+    assert agent._warmup_thread is None
+    agent.start_warmup()
+    assert agent._warmup_thread.is_alive()
+    agent.stop()
+    assert agent._warmup_thread is None
+
+
+def test_agent_warmup_interval_fits_keep_alive(mock_ollama):
+    """Test that warm-up pings are scheduled before a shorter keep-alive expires."""
+    assert ConversationalAgent(keep_alive="1h", warmup_interval=600)._warmup_interval == 600
+    assert ConversationalAgent(keep_alive="-1", warmup_interval=600)._warmup_interval == 600
+    assert ConversationalAgent(keep_alive="5m", warmup_interval=600)._warmup_interval == 270
+    assert ConversationalAgent(keep_alive=0, warmup_interval=600)._warmup_interval == 0
+
+
+def test_agent_warmup_pings_after_idle(mock_ollama):
+    """Test that a ping fires one interval after the last activity, inside the keep-alive."""
+    clock = [1000.0]
+    pings = []
+    waits = []
+
+    with patch('backend.services.agent_service.time') as mock_time:
+        mock_time.monotonic.side_effect = lambda: clock[0]
+        agent = ConversationalAgent(model_name="mock_model", keep_alive="15m", warmup_interval=600)
+
+        def fake_warm_up():
+            pings.append(clock[0])
+            agent._last_activity = clock[0]
+            return True
+
+        def fake_wait(timeout):
+            waits.append(timeout)
+            if len(waits) == 1:
+                # A turn lands just after the startup ping.
+                agent._last_activity = clock[0] + 1
+            clock[0] += timeout
+            return len(pings) >= 2
+
+        agent.warm_up = fake_warm_up
+        agent._stop_event = MagicMock(wait=fake_wait)
+        agent._warmup_loop()
+
+    assert pings == [1000.0, 1601.0]
+    assert pings[1] - 1001.0 <= 600 < 15 * 60
+
+
+def test_keep_alive_seconds():
+    """Test parsing of Ollama keep-alive durations."""
+    assert _keep_alive_seconds("30m") == 1800
+    assert _keep_alive_seconds("90s") == 90
+    assert _keep_alive_seconds("1h30m") == 5400
+    assert _keep_alive_seconds("1.5h") == 5400
+    assert _keep_alive_seconds("500ms") == 0.5
+    assert _keep_alive_seconds(300) == 300
+    assert _keep_alive_seconds(-1) is None
+    assert _keep_alive_seconds("-1m") is None
+
+
 # --- Unit Tests for Transcription Service ---
 @pytest.fixture
 def sample_wav_path():
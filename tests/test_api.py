@@ -43,6 +43,17 @@ async def test_process_audio_endpoint_invalid_format():
     assert "Please upload a .wav file" in response.json()["detail"]
 
 
+def test_llm_metrics_endpoint():
+    """Test that /metrics/llm reports cold and steady-state latency summaries."""
+    response = client.get("/metrics/llm")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) == {"cold", "steady"}
+    for summary in data.values():
+        assert set(summary) == {"count", "avg_ms", "last_ms", "max_ms"}
+        assert isinstance(summary["count"], int)
+
+
 @pytest.mark.asyncio
 async def test_root_endpoint(client: AsyncClient):
     """Test the root endpoint."""